@@ -11,73 +11,93 @@ And converts to:
   .single() as { data: Row<'table'> | null; error: any }
 """
 
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def fix_file(filepath):
-    """Fix type assertions in a single file."""
+from fix_common import (
+    content_digest, load_cache, load_digests, read_if_contains, save_cache,
+    source_version, update_digests, walk_ts, write_atomic,
+)
+
+# Literal prefix shared by every assertion pattern, used to skip files cheaply
+NEEDLE = b"as { data: Row<"
+
+# Key for this script's entries in the shared digest cache
+CACHE_KEY = 'fix-assertions'
+
+# Query methods that can follow a misplaced type assertion
+METHODS = ['or', 'order', 'limit', 'range', 'gte', 'lte', 'gt', 'lt', 'not', 'in', 'contains', 'filter']
+
+# Whitespace around the line break is limited to [ \t] so a match never
+# wanders across several lines, and ASCII mode skips the Unicode tables.
+# The line break itself is captured and put back, so CRLF files stay CRLF.
+
+# Pattern 1: Type assertion before .single()
+# Match: ) as { data: Row<'...'>[] | null; error: any }
+#        .single() as { data: Row<'...'> | null; error: any }
+PAT1 = re.compile(r"(\)) as \{ data: Row<'([^']+)'>(\[\])? \| null; error: any \}[ \t]*(\r?\n)([ \t]*)\.single\(\) as \{ data: Row<'\2'> \| null; error: any \}", re.ASCII)
+
+# Pattern 2: Type assertion before any other query method, as one alternation
+METHOD_ALT = "|".join(map(re.escape, METHODS))
+PAT_METHODS = re.compile(rf"(\)) as \{{ data: Row<'([^']+)'>(\[\])? \| null; error: any \}}[ \t]*(\r?\n)([ \t]*)(\.(?:{METHOD_ALT})\()", re.ASCII)
+
+# Pattern 3: Array type assertion before a bare .single(), the only case
+# the first two patterns leave behind
+PAT_SINGLE_ARRAY = re.compile(r"(\)) as \{ data: Row<'([^']+)'>\[\] \| null; error: any \}[ \t]*(\r?\n)([ \t]*)\.single\(", re.ASCII)
+
+def apply_assertion_patterns(content):
+    """Rewrite misplaced assertions in file content, returning (content, fixes)."""
+    fixes = 0
+
+    # Pattern 1: Type assertion before .single()
+    replacement1 = r"\1\4\5.single() as { data: Row<'\2'> | null; error: any }"
+    content, count = PAT1.subn(replacement1, content)
+    fixes += count
+
+    # Pattern 2: Type assertion before other query methods
+    # Template replacement keeps the substitution loop inside the re engine
+    content, count = PAT_METHODS.subn(r"\1\4\5\6", content)
+    fixes += count
+
+    # Pattern 3: Array type assertion before a bare .single()
+    content, count = PAT_SINGLE_ARRAY.subn(r"\1\3\4.single(", content)
+    fixes += count
+
+    return content, fixes
+
+def fix_file(filepath, known_digest=None):
+    """Fix type assertions in a single file.
+
+    Returns (fixed, count, digest), where digest identifies the file's
+    content after fixing, or is None when the file has nothing to fix.
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        original = content
-        fixes = 0
-
-        # Pattern 1: Type assertion before .single()
-        # Match: ) as { data: Row<'...'>[] | null; error: any }
-        #        .single() as { data: Row<'...'> | null; error: any }
-        pattern1 = r"(\)) as \{ data: Row<'([^']+)'>(\[\])? \| null; error: any \}\s*\n(\s*)\.single\(\) as \{ data: Row<'\2'> \| null; error: any \}"
-        replacement1 = r"\1\n\4.single() as { data: Row<'\2'> | null; error: any }"
-        content, count = re.subn(pattern1, replacement1, content)
-        fixes += count
-
-        # Pattern 2: Type assertion before other query methods
-        # List of methods that can follow
-        methods = ['or', 'order', 'limit', 'range', 'gte', 'lte', 'gt', 'lt', 'not', 'in', 'contains', 'filter']
-
-        for method in methods:
-            pattern = rf"(\)) as \{{ data: Row<'([^']+)'>(\[\])? \| null; error: any \}}\s*\n(\s*)\.{method}\("
-            replacement = rf"\1\n\4.{method}("
-            content, count = re.subn(pattern, replacement, content)
-            fixes += count
-
-        # Pattern 3: Find any remaining type assertions followed by more query chain
-        # This is a broader catch-all
-        pattern3 = r"(\)) as \{ data: Row<'([^']+)'>(\[\])? \| null; error: any \}\s*\n(\s*)(\.[a-z_]+\()"
-
-        def check_and_replace(match):
-            """Check if this needs fixing."""
-            paren = match.group(1)
-            table = match.group(2)
-            array = match.group(3) or ''
-            indent = match.group(4)
-            next_method = match.group(5)
-
-            # If it's .single() and array notation, we need the single() type
-            if next_method == '.single(' and array:
-                return f"{paren}\n{indent}{next_method}"
-            # For other methods, just remove the assertion
-            elif next_method.startswith(('.or(', '.order(', '.limit(', '.range(',
-                                        '.gte(', '.lte(', '.gt(', '.lt(',
-                                        '.not(', '.in(', '.contains(', '.filter(')):
-                return f"{paren}\n{indent}{next_method}"
-            # Keep as is for other cases
-            return match.group(0)
-
-        content, count = re.subn(pattern3, check_and_replace, content)
-        fixes += count
+        # Skip the regex passes (and the decode) when no assertion can match
+        raw = read_if_contains(filepath, NEEDLE)
+        if raw is None:
+            return False, 0, None
+
+        # Already processed by an earlier run and not edited since
+        digest = content_digest(raw)
+        if digest == known_digest:
+            return False, 0, digest
+
+        original = raw.decode('utf-8')
+        content, fixes = apply_assertion_patterns(original)
 
         if content != original:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True, fixes
+            data = content.encode('utf-8')
+            write_atomic(filepath, data)
+            return True, fixes, content_digest(data)
 
-        return False, 0
+        return False, 0, digest
 
     except Exception as e:
         print(f"Error processing {filepath}: {e}", file=sys.stderr)
-        return False, 0
+        return False, 0, None
 
 def main():
     """Main function."""
@@ -88,25 +108,51 @@ def main():
         return 1
 
     # Get list of files with TS errors from command line or find all .ts files
-    if len(sys.argv) > 1:
-        files = [Path(f) for f in sys.argv[1:]]
+    explicit = len(sys.argv) > 1
+    if explicit:
+        # Named files may be missing or too small to hold an assertion;
+        # walked files are known to exist and the worker checks their size
+        candidates = []
+        for filepath in sys.argv[1:]:
+            try:
+                if os.stat(filepath).st_size >= len(NEEDLE):
+                    candidates.append(filepath)
+            except OSError:
+                continue
     else:
-        files = list(lib_dir.rglob('*.ts'))
+        candidates = list(walk_ts(lib_dir))
+
+    cache = load_cache()
+    digests = load_digests(cache, CACHE_KEY, source_version(__file__))
+    # Files named on the command line are always processed; the cache only
+    # lets a full walk skip files that have not changed
+    if explicit:
+        known = [None] * len(candidates)
+    else:
+        known = [digests.get(str(filepath)) for filepath in candidates]
 
     total_fixed = 0
     total_files = 0
-
-    for filepath in files:
-        if not filepath.exists():
-            continue
-
-        fixed, count = fix_file(filepath)
-        if fixed:
-            print(f"✅ {filepath}: Fixed {count} assertion(s)")
-            total_fixed += count
-            total_files += 1
-        elif count == 0:
-            pass  # Silently skip files with no changes
+    messages = []
+
+    # Files are independent, so fan them out across processes; map() yields
+    # results in submission order, which keeps the output stable
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(fix_file, candidates, known, chunksize=32)
+        for filepath, (fixed, count, digest) in zip(candidates, results):
+            update_digests(digests, filepath, digest)
+            if fixed:
+                messages.append(f"✅ {filepath}: Fixed {count} assertion(s)")
+                total_fixed += count
+                total_files += 1
+            elif count == 0:
+                pass  # Silently skip files with no changes
+
+    save_cache(cache)
+
+    # One write for all per-file messages rather than a print per file
+    if messages:
+        sys.stdout.write('\n'.join(messages) + '\n')
 
     print(f"\n📊 Summary: Fixed {total_fixed} assertions in {total_files} files")
     return 0
@@ -2,32 +2,60 @@
 """Fix remaining broken import statements."""
 
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def fix_file(filepath):
-    """Fix import statements in a file."""
+from fix_common import (
+    content_digest, load_cache, load_digests, read_if_contains, save_cache,
+    source_version, update_digests, walk_ts, write_atomic,
+)
+
+# Import line that every broken block contains, used to skip files cheaply
+NEEDLE = b"import type { Row } from '@/lib/supabase/helpers'"
+
+# Key for this script's entries in the shared digest cache
+CACHE_KEY = 'fix-final-imports'
+
+# Pattern: import {\nimport type { Row } from '@/lib/supabase/helpers'
+# Replace with: import type { Row } from '@/lib/supabase/helpers'\nimport {
+IMPORT_PAT = re.compile(r"import \{[ \t]*(\r?\n)import type \{ Row \} from '@/lib/supabase/helpers'", re.ASCII)
+IMPORT_REPL = r"import type { Row } from '@/lib/supabase/helpers'\1import {"
+
+def apply_import_pattern(content):
+    """Hoist the Row import out of a broken import block, returning (content, count)."""
+    return IMPORT_PAT.subn(IMPORT_REPL, content)
+
+def fix_file(filepath, known_digest=None):
+    """Fix import statements in a file.
+
+    Returns (fixed, digest), where digest identifies the file's content
+    after fixing, or is None when the file has nothing to fix.
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Skip files that never import the Row helper type
+        raw = read_if_contains(filepath, NEEDLE)
+        if raw is None:
+            return False, None
 
-        original = content
+        # Already processed by an earlier run and not edited since
+        digest = content_digest(raw)
+        if digest == known_digest:
+            return False, digest
 
-        # Pattern: import {\nimport type { Row } from '@/lib/supabase/helpers'
-        # Replace with: import type { Row } from '@/lib/supabase/helpers'\nimport {
-        pattern1 = r"import \{\s*\nimport type \{ Row \} from '@/lib/supabase/helpers'"
-        replacement1 = r"import type { Row } from '@/lib/supabase/helpers'\nimport {"
-        content = re.sub(pattern1, replacement1, content)
+        original = raw.decode('utf-8')
+        content, _ = apply_import_pattern(original)
 
         if content != original:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
+            data = content.encode('utf-8')
+            write_atomic(filepath, data)
+            return True, content_digest(data)
 
-        return False
+        return False, digest
 
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
-        return False
+        return False, None
 
 def main():
     """Main function."""
@@ -36,17 +64,31 @@ def main():
         print("Error: lib/ directory not found")
         return 1
 
-    files = list(lib_dir.rglob('*.ts'))
+    files = list(walk_ts(lib_dir))
     fixed_count = 0
+    messages = []
+
+    cache = load_cache()
+    digests = load_digests(cache, CACHE_KEY, source_version(__file__))
+    known = [digests.get(str(filepath)) for filepath in files]
+
+    # Files are independent, so fan them out across processes
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(fix_file, files, known, chunksize=32)
+        for filepath, (fixed, digest) in zip(files, results):
+            update_digests(digests, filepath, digest)
+            if fixed:
+                messages.append(f"✅ Fixed {filepath}")
+                fixed_count += 1
+
+    save_cache(cache)
 
-    for filepath in files:
-        if fix_file(filepath):
-            print(f"✅ Fixed {filepath}")
-            fixed_count += 1
+    # One write for all per-file messages rather than a print per file
+    if messages:
+        sys.stdout.write('\n'.join(messages) + '\n')
 
     print(f"\n📊 Fixed {fixed_count} files")
     return 0
 
 if __name__ == '__main__':
-    import sys
     sys.exit(main())
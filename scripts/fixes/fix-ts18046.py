@@ -8,13 +8,24 @@ import re
 import sys
 from pathlib import Path
 
+from fix_common import write_atomic
+
+# Output of: npx tsc --noEmit 2>&1 | grep TS18046
+ERRORS_FILE = '/tmp/ts18046_errors.txt'
+
+# Parse: file(line,col): error TS18046: 'varName' is of type 'unknown'
+ERR_RE = re.compile(r"^(.+?)\((\d+),(\d+)\): error TS18046: '(.+?)' is of type 'unknown'")
+
 def read_errors():
     """Read TS18046 errors from file"""
     errors = []
-    with open('/tmp/ts18046_errors.txt', 'r') as f:
-        for line in f:
-            # Parse: file(line,col): error TS18046: 'varName' is of type 'unknown'
-            match = re.match(r"^(.+?)\((\d+),(\d+)\): error TS18046: '(.+?)' is of type 'unknown'", line)
+    with open(ERRORS_FILE, 'r') as f:
+        # One read and split instead of per-line I/O; tsc output can be huge
+        for line in f.read().splitlines():
+            # Cheap literal check before running the parser
+            if 'TS18046' not in line:
+                continue
+            match = ERR_RE.match(line)
             if match:
                 file_path, line_num, col, var_name = match.groups()
                 errors.append({
@@ -25,52 +36,130 @@ def read_errors():
                 })
     return errors
 
+# Names conventionally bound by catch blocks
+CATCH_VARS = frozenset({'error', 'err', 'e'})
+
+# Compiled rewrite patterns per variable name, shared by every file in a run
+_var_patterns = {}
+
+def var_patterns(var_name):
+    """Return the compiled rewrite patterns for a variable name"""
+    patterns = _var_patterns.get(var_name)
+    if patterns is None:
+        name = re.escape(var_name)
+        patterns = _var_patterns[var_name] = {
+            'dot': re.compile(rf'\b{name}\.'),
+            'paren_arrow': re.compile(rf'\({name}\s*=>'),
+            'arrow': re.compile(rf'\b{name}\s*=>'),
+        }
+    return patterns
+
+def wrap_at_column(line, var_name, col, cast):
+    """Rewrite var_name. at a 1-based column to (var_name as cast).
+
+    Returns None when the column does not point at a bare access, e.g. when
+    tsc counted UTF-16 units that differ from the decoded line.
+    """
+    start = col - 1
+    end = start + len(var_name)
+    if start < 0 or line[start:end] != var_name or line[end:end + 1] != '.':
+        return None
+    before = line[start - 1:start]
+    if before and (before.isalnum() or before in '_$'):
+        return None
+    return f'{line[:start]}({var_name} as {cast}){line[end:]}'
+
+def fix_line(line, var_name, col=None):
+    """Apply the fix for one error to a line, returning the new line"""
+    # Nothing to rewrite when the variable is not on this line
+    if var_name not in line:
+        return line
+
+    # Accesses that get a type assertion are usually edited straight at the
+    # error column; the rules below only run when that does not line up
+    is_catch = var_name in CATCH_VARS
+    is_callback = '.map(' in line or '.filter(' in line or '.forEach(' in line
+    if col and (is_catch or not is_callback):
+        fixed = wrap_at_column(line, var_name, col, 'Error' if is_catch else 'any')
+        if fixed is not None:
+            return fixed
+
+    # Pattern 1: error/err/e in catch blocks
+    if is_catch:
+        # Replace error.message with (error as Error).message; a plain
+        # literal replace, so this common case never touches a regex
+        if f'{var_name}.message' in line and f'({var_name} as Error)' not in line:
+            return line.replace(f'{var_name}.message', f'({var_name} as Error).message')
+        # Replace other error. accesses
+        elif f'{var_name}.' in line and f'({var_name} as Error)' not in line and f'({var_name} as any)' not in line:
+            return var_patterns(var_name)['dot'].sub(f'({var_name} as Error).', line)
+
+    # Pattern 2: Callback parameters in map/filter/forEach
+    elif is_callback:
+        if f'{var_name}: any' not in line:
+            patterns = var_patterns(var_name)
+            # Add type annotation: (varName => to (varName: any =>
+            line = patterns['paren_arrow'].sub(f'({var_name}: any =>', line)
+            # Also handle without parens: varName =>
+            line = patterns['arrow'].sub(f'({var_name}: any) =>', line)
+            return line
+
+    # Pattern 3: General unknown variables - add type assertion
+    elif f'{var_name}.' in line and f'({var_name} as any)' not in line:
+        return var_patterns(var_name)['dot'].sub(f'({var_name} as any).', line)
+
+    return line
+
+def group_by_file(errors):
+    """Group parsed errors by the file they point at"""
+    files = {}
+    for error in errors:
+        files.setdefault(error['file'], []).append(error)
+    return files
+
+def apply_error_fixes(raw, file_errors):
+    """Apply a file's error fixes to its bytes, returning (raw, changed)"""
+    # Group errors by line so each line is decoded and rebuilt once
+    by_line = {}
+    for error in file_errors:
+        by_line.setdefault(error['line'] - 1, []).append((error['col'], error['var']))
+
+    # Split only as far as the last line with an error; the rest of the file
+    # stays in one piece. Lines stay as bytes and only the ones with errors
+    # get decoded. Joining on the same separator restores any trailing newline.
+    last_idx = max(by_line)
+    lines = raw.split(b'\n', last_idx + 1)
+    changed = False
+
+    for line_idx, line_errors in by_line.items():
+        if line_idx >= len(lines):
+            continue
+
+        original = lines[line_idx].decode('utf-8')
+        line = original
+        # Right to left, so a column edit never shifts the columns still to come
+        for col, var_name in sorted(line_errors, reverse=True):
+            line = fix_line(line, var_name, col)
+
+        # A fix can fire without changing anything (e.g. no arrow to annotate)
+        if line != original:
+            lines[line_idx] = line.encode('utf-8')
+            changed = True
+
+    if not changed:
+        return raw, False
+    return b'\n'.join(lines), True
+
 def fix_file(file_path, file_errors):
     """Fix errors in a single file"""
     try:
-        with open(file_path, 'r') as f:
-            lines = f.readlines()
-
-        modified = False
+        with open(file_path, 'rb') as f:
+            raw = f.read()
 
-        for error in file_errors:
-            line_idx = error['line'] - 1
-            if line_idx >= len(lines):
-                continue
+        data, changed = apply_error_fixes(raw, file_errors)
 
-            line = lines[line_idx]
-            var_name = error['var']
-
-            # Pattern 1: error/err/e in catch blocks
-            if var_name in ['error', 'err', 'e']:
-                # Replace error.message with (error as Error).message
-                if f'{var_name}.message' in line and f'({var_name} as Error)' not in line:
-                    line = line.replace(f'{var_name}.message', f'({var_name} as Error).message')
-                    modified = True
-                # Replace other error. accesses
-                elif f'{var_name}.' in line and f'({var_name} as Error)' not in line and f'({var_name} as any)' not in line:
-                    line = re.sub(rf'\b{var_name}\.', f'({var_name} as Error).', line)
-                    modified = True
-
-            # Pattern 2: Callback parameters in map/filter/forEach
-            elif '.map(' in line or '.filter(' in line or '.forEach(' in line:
-                if f'{var_name}: any' not in line:
-                    # Add type annotation: (varName => to (varName: any =>
-                    line = re.sub(rf'\({var_name}\s*=>', f'({var_name}: any =>', line)
-                    # Also handle without parens: varName =>
-                    line = re.sub(rf'\b{var_name}\s*=>', f'({var_name}: any) =>', line)
-                    modified = True
-
-            # Pattern 3: General unknown variables - add type assertion
-            elif f'{var_name}.' in line and f'({var_name} as any)' not in line:
-                line = re.sub(rf'\b{var_name}\.', f'({var_name} as any).', line)
-                modified = True
-
-            lines[line_idx] = line
-
-        if modified:
-            with open(file_path, 'w') as f:
-                f.writelines(lines)
+        if changed:
+            write_atomic(file_path, data)
             return True
 
         return False
@@ -90,11 +179,7 @@ def main():
     print(f"📝 Found {len(errors)} TS18046 errors")
 
     # Group errors by file
-    files = {}
-    for error in errors:
-        if error['file'] not in files:
-            files[error['file']] = []
-        files[error['file']].append(error)
+    files = group_by_file(errors)
 
     fixed_count = 0
     for file_path, file_errors in files.items():
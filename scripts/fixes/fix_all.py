@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Run the assertion, import and TS18046 fixes in a single pass.
+
+Each file is read once, has every rewrite applied in memory and is written
+at most once, instead of the three scripts each walking and rewriting the
+tree. TS18046 edits go first because tsc line numbers refer to the file as
+it was when the errors were collected.
+"""
+
+import functools
+import importlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from fix_common import read_if_contains, walk_ts, write_atomic
+
+# The fix scripts have hyphenated names, so load them by module name
+assertions = importlib.import_module('fix-assertions')
+imports = importlib.import_module('fix-final-imports')
+ts18046 = importlib.import_module('fix-ts18046')
+
+@functools.lru_cache(maxsize=4096)
+def rewrite(data):
+    """Apply the assertion and import rewrites to file bytes.
+
+    Returns (data, assertion_count, import_count). These rewrites depend on
+    nothing but the bytes, so identical files (generated modules, re-export
+    indexes) are only rewritten once per worker.
+    """
+    assertion_count = 0
+    import_count = 0
+    has_assertions = assertions.NEEDLE in data
+    has_imports = imports.NEEDLE in data
+    if has_assertions or has_imports:
+        content = data.decode('utf-8')
+        if has_assertions:
+            content, assertion_count = assertions.apply_assertion_patterns(content)
+        if has_imports:
+            content, import_count = imports.apply_import_pattern(content)
+        data = content.encode('utf-8')
+    return data, assertion_count, import_count
+
+def fix_file(filepath, file_errors, walked=True):
+    """Apply every fix to a single file.
+
+    The assertion and import rewrites only run on walked lib/ files, as
+    they do in their own scripts; other files only get their TS18046 fixes.
+
+    Returns (fixed, assertion_count, import_count, errors_fixed).
+    """
+    try:
+        if file_errors or not walked:
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+        else:
+            # Without errors to fix, only files holding a needle matter
+            raw = read_if_contains(filepath, assertions.NEEDLE, imports.NEEDLE)
+            if raw is None:
+                return False, 0, 0, False
+
+        data = raw
+        errors_fixed = False
+        if file_errors:
+            data, errors_fixed = ts18046.apply_error_fixes(data, file_errors)
+
+        assertion_count = 0
+        import_count = 0
+        if walked:
+            # TS18046 edits depend on the error list, so only these are cached
+            data, assertion_count, import_count = rewrite(data)
+
+        if data != raw:
+            write_atomic(filepath, data)
+            return True, assertion_count, import_count, errors_fixed
+
+        return False, 0, 0, False
+
+    except Exception as e:
+        print(f"Error processing {filepath}: {e}", file=sys.stderr)
+        return False, 0, 0, False
+
+def main():
+    """Main function."""
+    lib_dir = Path('lib')
+    if not lib_dir.exists():
+        print("Error: lib/ directory not found", file=sys.stderr)
+        return 1
+
+    # Parse the TS18046 errors once up front, if they have been collected
+    errors = ts18046.read_errors() if os.path.exists(ts18046.ERRORS_FILE) else []
+    errors_by_file = {
+        os.path.normpath(path): file_errors
+        for path, file_errors in ts18046.group_by_file(errors).items()
+    }
+
+    files = [os.path.normpath(path) for path in walk_ts(lib_dir)]
+    # TS18046 errors can point at files outside the walk (other directories,
+    # .d.ts files); those get only their TS18046 fixes
+    walked = [True] * len(files)
+    in_lib = set(files)
+    extra = [path for path in errors_by_file if path not in in_lib]
+    files += extra
+    walked += [False] * len(extra)
+    file_errors = [errors_by_file.get(path, []) for path in files]
+
+    total_assertions = 0
+    total_imports = 0
+    total_files = 0
+    messages = []
+
+    # Files are independent, so fan them out across processes; map() yields
+    # results in submission order, which keeps the output stable
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(fix_file, files, file_errors, walked, chunksize=32)
+        for filepath, (fixed, assertion_count, import_count, errors_fixed) in zip(files, results):
+            if fixed:
+                parts = []
+                if assertion_count:
+                    parts.append(f"{assertion_count} assertion(s)")
+                if import_count:
+                    parts.append(f"{import_count} import(s)")
+                if errors_fixed:
+                    parts.append("TS18046 errors")
+                messages.append(f"✅ {filepath}: Fixed {', '.join(parts)}")
+                total_assertions += assertion_count
+                total_imports += import_count
+                total_files += 1
+
+    # One write for all per-file messages rather than a print per file
+    if messages:
+        sys.stdout.write('\n'.join(messages) + '\n')
+
+    print(f"\n📊 Summary: Fixed {total_assertions} assertions and {total_imports} imports "
+          f"in {total_files} files")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
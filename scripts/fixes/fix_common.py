@@ -0,0 +1,100 @@
+"""Helpers shared by the fix scripts in this directory."""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# Files larger than this are memory-mapped for the needle check
+MMAP_THRESHOLD = 64 * 1024
+
+# Digests of files already processed, keyed by script so the fix scripts
+# sharing the cache do not skip each other's work
+CACHE_FILE = Path('.fix-cache.json')
+
+def walk_ts(root):
+    """Yield paths of .ts sources under root, skipping declarations and node_modules."""
+    # scandir entries carry their file type, so no extra stat per entry
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            # Skip unreadable directories rather than aborting the whole walk
+            print(f"Warning: skipping {directory}: {e}", file=sys.stderr)
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != 'node_modules':
+                        stack.append(entry.path)
+                elif (entry.name.endswith('.ts') and not entry.name.endswith('.d.ts')
+                        and entry.is_file(follow_symlinks=False)):
+                    yield entry.path
+
+def read_if_contains(filepath, *needles):
+    """Return the file's bytes, or None when none of the needles occur in it."""
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+            raw = f.read()
+            return raw if any(needle in raw for needle in needles) else None
+        # Map large files so the common no-match case never copies them
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if all(mm.find(needle) == -1 for needle in needles):
+                return None
+            return mm[:]
+
+def write_atomic(filepath, data):
+    """Write data via a temporary file so readers never see a partial file."""
+    # Replace the file a symlink points at, not the link itself
+    target = os.path.realpath(filepath)
+    tmp = f"{target}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        shutil.copymode(target, tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def load_cache():
+    """Load per-file content digests from previous runs."""
+    try:
+        return json.loads(CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    """Persist per-file content digests for the next run."""
+    try:
+        CACHE_FILE.write_text(json.dumps(cache, indent=2, sort_keys=True))
+    except OSError as e:
+        print(f"Warning: could not write {CACHE_FILE}: {e}", file=sys.stderr)
+
+def load_digests(cache, key, version):
+    """Return the digests stored under key, starting afresh if version changed."""
+    entry = cache.get(key)
+    if not isinstance(entry, dict) or entry.get('version') != version:
+        entry = cache[key] = {'version': version, 'digests': {}}
+    return entry['digests']
+
+def source_version(script_path):
+    """Digest of a script's source, so editing its rewrites invalidates the cache."""
+    return content_digest(Path(script_path).read_bytes())
+
+def content_digest(raw):
+    """Short digest identifying a file's bytes."""
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+def update_digests(digests, filepath, digest):
+    """Record a file's digest, or forget it when there is nothing to cache."""
+    if digest:
+        digests[str(filepath)] = digest
+    else:
+        digests.pop(str(filepath), None)